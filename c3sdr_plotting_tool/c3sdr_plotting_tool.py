@@ -1,24 +1,517 @@
-import numbers
+import base64
+import html
+import json
+import tempfile
+import warnings
+import webbrowser
+from functools import lru_cache, partial
+from string import Template
 
 import numpy as np
 import plotly.graph_objects as go
-import plotly.io as pio
 
+from plotly.colors import DEFAULT_PLOTLY_COLORS
 from plotly.subplots import make_subplots
 
-# Set the default width and height in pixels for saving plots as a static image.
-pio.kaleido.scope.default_width = 1200
-pio.kaleido.scope.default_height = 600
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba is optional. Without it the robust statistics are calculated with vectorised NumPy instead.
+    njit = None
+    prange = range
+
+# Types of single values of create_plot parameters. Checking the exact type avoids the slow isinstance check against
+# the numbers.Number abstract base class, with numpy scalars checked separately.
+_SCALAR_TYPES = (int, float, bool, str)
+
+# Plots with more points than this pass the data to Plotly as float32 where this is lossless.
+_FLOAT32_MIN_POINTS = 5000
+# Single scattergeo plots with more points than this are drawn as scattermapbox plots, which are rendered with WebGL.
+_SCATTERGEO_MAX_POINTS = 20000
+# The number of bins on each axis of 2D histograms of numerical data if it is not specified.
+_HIST2D_DEFAULT_BINS = 100
+# Plot types that can be drawn with the deck.gl backend.
+_DECKGL_PLOT_TYPES = (None, 'scatter', 'mean', 'mean_and_uncert')
+# The interquartile range of a normal distribution in standard deviations, used for the robust standard deviation.
+_IQR_PER_STD = 1.349
+# Bins with more points than this are partitioned rather than sorted to find the quartiles.
+_PARTITION_MIN_POINTS = 256
+
+
+def _quartiles(data, n):
+    """
+    Calculate the lower quartile, median and upper quartile of the n smallest values of data, interpolated linearly in
+    the same way as np.percentile. Only the values either side of each quartile are needed, so large bins are
+    partitioned around them rather than sorted. Small bins are sorted, which is cheaper than partitioning them when
+    there are many bins.
+
+    :param data:
+        The data.
+    :param n:
+        The number of smallest values to use, which must be at least 1.
+    :return:
+        The lower quartile, the median and the upper quartile.
+    """
+    positions = np.array([0.25, 0.5, 0.75]) * (n - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, n - 1)
+    if len(data) > _PARTITION_MIN_POINTS:
+        ordered = np.partition(data, np.concatenate((lower, upper)))
+    else:
+        ordered = np.sort(data)
+    fractions = positions - lower
+    quartiles = ordered[lower] + fractions * (ordered[upper] - ordered[lower])
+    return quartiles[0], quartiles[1], quartiles[2]
+
+
+def _robust_bin_stats(y_sorted, bin_starts, bin_ends, hist, outliers):
+    """
+    Calculate the median and the uncertainty on the median of each bin, optionally rejecting outliers and
+    recalculating the statistics from the remaining data.
+
+    :param y_sorted:
+        The data sorted by bin, so that the data for each bin is a contiguous slice.
+    :param bin_starts:
+        The index of the start of each bin in y_sorted.
+    :param bin_ends:
+        The index of the end of each bin in y_sorted.
+    :param hist:
+        The number of data points in each bin used to calculate the uncertainty.
+    :param outliers:
+        Threshold for outlier rejection. Infinite for no outlier rejection.
+    :return:
+        The median, the uncertainty on the median and the number of data points used in each bin.
+    """
+    nbins = len(bin_starts)
+    means = np.empty(nbins)
+    uncert = np.empty(nbins)
+    counts = np.empty(nbins, dtype=np.int64)
+    for b in prange(nbins):
+        data = y_sorted[bin_starts[b]:bin_ends[b]]
+        n = hist[b]
+        median = np.nan
+        std = np.nan
+        if len(data) > 0:
+            q25, median, q75 = _quartiles(data, len(data))
+            std = (q75 - q25) / _IQR_PER_STD
+        if outliers < np.inf:
+            # The threshold is the same for all the data in the bin, so the data that is kept are the n smallest
+            # values and the quartiles can be found by partitioning the data again rather than copying the data kept.
+            n = np.sum((data - median) / (std / np.sqrt(n)) < outliers)
+            median = np.nan
+            std = np.nan
+            if n > 0:
+                q25, median, q75 = _quartiles(data, n)
+                std = (q75 - q25) / _IQR_PER_STD
+        means[b] = median
+        uncert[b] = std / np.sqrt(n)
+        counts[b] = n
+    return means, uncert, counts
+
+
+def _sorted_quartiles(data, offsets, counts):
+    """
+    Calculate the lower quartile, median and upper quartile of every bin at once from data that is sorted within each
+    bin, interpolated linearly in the same way as np.percentile.
+
+    :param data:
+        The data, sorted within each bin.
+    :param offsets:
+        The index of the start of each bin in data.
+    :param counts:
+        The number of data points in each bin.
+    :return:
+        An array with the lower quartile, median and upper quartile of each bin in its rows. Empty bins are NaN.
+    """
+    quartiles = np.full((len(counts), 3), np.nan)
+    filled = counts > 0
+    positions = np.array([0.25, 0.5, 0.75]) * (counts[filled, np.newaxis] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, counts[filled, np.newaxis] - 1)
+    fractions = positions - lower
+    lower += offsets[filled, np.newaxis]
+    upper += offsets[filled, np.newaxis]
+    quartiles[filled] = data[lower] + fractions * (data[upper] - data[lower])
+    return quartiles
+
+
+def _robust_bin_stats_numpy(y_sorted, bin_starts, bin_ends, hist, outliers):
+    """
+    Vectorised version of _robust_bin_stats used when Numba is not available, which avoids looping over the bins in
+    Python. The parameters and return values are the same.
+    """
+    nbins = len(bin_starts)
+    counts = bin_ends - bin_starts
+    offsets = np.cumsum(counts) - counts
+    # Gather the data for the bins into one array and sort it within each bin, so that the quartiles of every bin can
+    # be found by indexing.
+    bin_ids = np.repeat(np.arange(nbins), counts)
+    data = y_sorted[np.arange(len(bin_ids)) - offsets[bin_ids] + bin_starts[bin_ids]]
+    data = data[np.lexsort((data, bin_ids))]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quartiles = _sorted_quartiles(data, offsets, counts)
+        means = quartiles[:, 1]
+        uncert = (quartiles[:, 2] - quartiles[:, 0]) / (_IQR_PER_STD * np.sqrt(hist))
+        if outliers < np.inf:
+            # The threshold only depends on the bin, so the data that is kept is at the start of each sorted bin and
+            # only the number of points in each bin changes.
+            keep = (data - means[bin_ids]) / uncert[bin_ids] < outliers
+            hist = np.bincount(bin_ids[keep], minlength=nbins)
+            quartiles = _sorted_quartiles(data, offsets, hist)
+            means = quartiles[:, 1]
+            uncert = (quartiles[:, 2] - quartiles[:, 0]) / (_IQR_PER_STD * np.sqrt(hist))
+    return means, uncert, hist.astype(np.int64)
+
+
+def _is_single(value):
+    """
+    Whether a parameter of create_plot is a single value that applies to all plots when overplotting, rather than a
+    list with an element for each plot.
+
+    :param value:
+        The parameter.
+    :return:
+        True if the value is None, a string or a number.
+    """
+    return value is None or type(value) in _SCALAR_TYPES or isinstance(value, np.generic)
+
+
+def _bcast(value, n):
+    """
+    Expand a parameter of create_plot into a list with an element for each plot when overplotting.
+
+    :param value:
+        The parameter, either a single value or a list with an element for each plot.
+    :param n:
+        The number of plots.
+    :return:
+        A list of length n.
+    """
+    return [value] * n if _is_single(value) else list(value)
+
+
+def _asarr(a):
+    """
+    Convert data to a contiguous array once, so that the functions it is passed to do not each need to make their own
+    copy of a list or a non-contiguous array. Masked arrays and None are returned as they are.
+
+    :param a:
+        The data.
+    :return:
+        The data as an array.
+    """
+    if a is None or isinstance(a, np.ma.MaskedArray):
+        return a
+    return np.ascontiguousarray(a)
+
+
+def _inject_nans(arrays):
+    """
+    Join a sequence of arrays into a single array with a NaN between the data from each array, so that the data can be
+    plotted as a single trace without lines joining the separate arrays.
+
+    :param arrays:
+        The arrays to join.
+    :return:
+        The joined array.
+    """
+    pieces = [np.array([np.nan])] * (2 * len(arrays) - 1)
+    pieces[::2] = [np.asarray(a) for a in arrays]
+    return np.concatenate(pieces)
+
+
+def _lttb(x, y, n_out):
+    """
+    Choose the points to keep when downsampling a line with the Largest-Triangle-Three-Buckets algorithm, which keeps
+    the visual shape of the line. The points between the first and the last point are split into buckets and the point
+    of each bucket that forms the largest triangle with the point kept from the previous bucket and the mean of the
+    next bucket is kept.
+
+    :param x:
+        The x data of the line as float64.
+    :param y:
+        The y data of the line as float64.
+    :param n_out:
+        The number of points to keep, which must be at least 3 and less than the number of points.
+    :return:
+        The indices of the points to keep.
+    """
+    n = len(x)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[n_out - 1] = n - 1
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    for k in range(n_out - 2):
+        if k < n_out - 3:
+            next_x = np.mean(x[edges[k + 1]:edges[k + 2]])
+            next_y = np.mean(y[edges[k + 1]:edges[k + 2]])
+        else:
+            next_x = x[n - 1]
+            next_y = y[n - 1]
+        a = indices[k]
+        areas = np.abs((x[a] - next_x) * (y[edges[k]:edges[k + 1]] - y[a]) -
+                       (x[a] - x[edges[k]:edges[k + 1]]) * (next_y - y[a]))
+        indices[k + 1] = edges[k] + np.argmax(areas)
+    return indices
+
+
+def _thin(arrays, max_points, lines=False):
+    """
+    Thin data for plotting so that no more than max_points points are plotted. Markers are thinned by taking every nth
+    point. Lines are thinned with the Largest-Triangle-Three-Buckets algorithm, so that the shape of the line is kept.
+
+    :param arrays:
+        The arrays to thin, which have the same length, starting with x and y. Elements that are None or a single value
+        are returned as they are.
+    :param max_points:
+        The maximum number of points. None for no thinning.
+    :param lines:
+        Optional. Whether the data is plotted as a line.
+    :return:
+        A list of the thinned arrays.
+    """
+    n = len(arrays[0])
+    if max_points is None or n <= max_points:
+        return list(arrays)
+    x = np.asarray(arrays[0])
+    y = np.asarray(arrays[1])
+    if lines and max_points >= 3 and x.dtype.kind in 'iufM' and y.dtype.kind in 'iuf':
+        # Times are treated as a number of their units since the epoch.
+        x = x.astype(np.int64) if x.dtype.kind == 'M' else x
+        keep = _lttb(x.astype(np.float64), y.astype(np.float64), max_points)
+    else:
+        keep = slice(None, None, -(-n // max_points))
+    return [a if a is None or np.ndim(a) == 0 else np.asarray(a)[keep] for a in arrays]
+
+
+def _mapbox_zoom(xrange, yrange):
+    """
+    Calculate the zoom of a mapbox that shows approximately the given longitude and latitude ranges, assuming a map of
+    about 512 pixels square.
+
+    :param xrange:
+        The range of longitudes as [lon_low, lon_high].
+    :param yrange:
+        The range of latitudes as [lat_low, lat_high].
+    :return:
+        The zoom level.
+    """
+    # At zoom 0 the whole world, 360 degrees of longitude and 2 pi in Mercator y, is 512 pixels wide.
+    lon_span = abs(xrange[1] - xrange[0])
+    lats = np.radians(np.clip(yrange, -85.0, 85.0))
+    y_span = abs(np.diff(np.log(np.tan(0.25 * np.pi + 0.5 * lats)))[0])
+    spans = [360.0 / lon_span if lon_span > 0 else np.inf, 2.0 * np.pi / y_span if y_span > 0 else np.inf]
+    return float(np.clip(np.log2(min(spans)), 0.0, 22.0))
+
+
+def _to_float32(a):
+    """
+    Convert numerical data to a contiguous float32 array if float32 represents every value exactly. Integers up to 2**24
+    in magnitude and floats that are unchanged by the conversion qualify, but for example times in seconds since an
+    epoch do not. Other data is returned as is.
+
+    :param a:
+        The data to convert. May be None.
+    :return:
+        The converted data.
+    """
+    if a is None or np.ma.isMaskedArray(a):
+        return a
+    a = np.asarray(a)
+    if a.dtype.kind not in 'iuf' or a.size == 0:
+        return a
+    if a.dtype == np.float32:
+        return np.ascontiguousarray(a)
+    if a.dtype.kind in 'iu':
+        # Every integer up to 2**24 in magnitude is exactly representable as a float32.
+        if max(abs(int(a.min())), abs(int(a.max()))) <= 2 ** 24:
+            return np.ascontiguousarray(a, dtype=np.float32)
+        return a
+    with np.errstate(over='ignore'):
+        b = np.ascontiguousarray(a, dtype=np.float32)
+    # Only convert if the conversion is lossless, with NaNs staying NaN.
+    if np.all((b == a) | np.isnan(a)):
+        return b
+    return a
+
+
+@lru_cache(maxsize=256)
+def _cached_selection(size, color):
+    """
+    Cached version of _selection for hashable sizes and colors.
+    """
+    return {'marker': {'size': size, 'color': color}}
+
+
+def _selection(size, color):
+    """
+    Create the specification of the markers of selected or unselected points. Plots with the same marker size and color
+    share the same specification, which Plotly copies into each trace.
+
+    :param size:
+        The size of the markers.
+    :param color:
+        The color of the markers.
+    :return:
+        A dictionary specifying the markers.
+    """
+    try:
+        return _cached_selection(size, color)
+    except TypeError:
+        # Values that cannot be cached, such as lists, are not valid, but are passed on so that Plotly reports the
+        # error in the same way as for other invalid values.
+        return {'marker': {'size': size, 'color': color}}
+
+
+def _minify_js(js):
+    """
+    Strip the indentation and blank lines from JavaScript. The line breaks are kept, as the JavaScript relies on them
+    to end statements.
+
+    :param js:
+        The JavaScript.
+    :return:
+        The stripped JavaScript.
+    """
+    return '\n'.join(line.strip() for line in js.splitlines() if line.strip())
+
+
+if njit is not None:
+    _quartiles = njit(cache=True)(_quartiles)
+    _lttb = njit(cache=True)(_lttb)
+    # Compile eagerly for the types passed by Plotter.calculate_robust_statistics so that the first plot does not pay
+    # the cost of compilation. With cache=True this is only slow the first time the module is ever imported.
+    _robust_bin_stats = njit('Tuple((float64[:], float64[:], int64[:]))(float64[:], int64[:], int64[:], int64[:], '
+                             'float64)', parallel=True, cache=True, error_model='numpy')(_robust_bin_stats)
+else:
+    _robust_bin_stats = _robust_bin_stats_numpy
 
 
 class Plotter(object):
     """
     Plotting tool for C3S data rescue project.
     """
+    # JavaScript event handlers for interactive selection injected into the HTML of the plot by show_plot, with and
+    # without saving the selected point indices in a Jupyter notebook. The indentation is stripped once here rather
+    # than sending it to the browser every time a plot is shown.
+    _JS_JUPYTER = _minify_js("""
+        var ele = document.getElementById("{plot_id}");
+        ele.on('plotly_selected', function(eventData){
+            var selectedpoints = [];
+            IPython.notebook.kernel.execute('SELECTED_POINT_INDS = []')
+
+            eventData.points.forEach(function(pt) {
+                selectedpoints.push(pt.pointNumber);
+                IPython.notebook.kernel.execute('SELECTED_POINT_INDS.append(' + pt.pointNumber.toString() +')')
+            });
+            var update = {
+                'selectedpoints': [selectedpoints]
+            };
+            Plotly.restyle("{plot_id}", update)
+        });
+        ele.on('plotly_deselect', function(){
+            var update = {
+                'selectedpoints': [null]
+            };
+            Plotly.restyle("{plot_id}", update)
+        });
+    """)
+    _JS_PLAIN = _minify_js("""
+        var ele = document.getElementById("{plot_id}");
+        ele.on('plotly_selected', function(eventData){
+            var selectedpoints = [];
+
+            eventData.points.forEach(function(pt) {
+                selectedpoints.push(pt.pointNumber);
+            });
+            var update = {
+                'selectedpoints': [selectedpoints]
+            };
+            Plotly.restyle("{plot_id}", update)
+        });
+        ele.on('plotly_deselect', function(){
+            var update = {
+                'selectedpoints': [null]
+            };
+            Plotly.restyle("{plot_id}", update)
+        });
+    """)
+    # HTML page drawing scatter and line plots with deck.gl for the deck.gl backend. The data of each plot is passed as
+    # base64 encoded float32 positions scaled to the unit square, which is fitted to the size of the plot.
+    _DECKGL_HTML = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<script src="https://unpkg.com/deck.gl@8.9.35/dist.min.js"></script>
+<style>
+body {margin: 0;}
+#title {position: absolute; z-index: 1; padding: 8px; font: 16px sans-serif;}
+#plot {position: relative; width: $width; height: $height;}
+</style>
+</head>
+<body>
+<div id="title">$title</div>
+<div id="plot"></div>
+<script>
+var plots = $plots;
+function decode(data) {
+    var bytes = Uint8Array.from(atob(data), function(c) {return c.charCodeAt(0);});
+    return new Float32Array(bytes.buffer);
+}
+function rgb(color) {
+    // Let the browser convert any CSS color to either #rrggbb or rgba(r, g, b, a).
+    var context = document.createElement('canvas').getContext('2d');
+    context.fillStyle = color;
+    var parsed = context.fillStyle;
+    if (parsed[0] === '#') {
+        return [1, 3, 5].map(function(i) {return parseInt(parsed.substr(i, 2), 16);});
+    }
+    var values = parsed.match(/[\\d.]+/g).map(Number);
+    return [values[0], values[1], values[2], values.length > 3 ? Math.round(255 * values[3]) : 255];
+}
+var container = document.getElementById('plot');
+var layers = [];
+plots.forEach(function(plot, i) {
+    var positions = decode(plot.positions);
+    var color = rgb(plot.color);
+    if (plot.lines) {
+        layers.push(new deck.PathLayer({
+            id: 'lines' + i,
+            data: {length: plot.starts.length, startIndices: new Uint32Array(plot.starts),
+                   attributes: {getPath: {value: positions, size: 2}}},
+            _pathType: 'open',
+            getColor: color,
+            getWidth: plot.width,
+            widthUnits: 'pixels'
+        }));
+    }
+    if (plot.markers) {
+        layers.push(new deck.ScatterplotLayer({
+            id: 'markers' + i,
+            data: {length: positions.length / 2, attributes: {getPosition: {value: positions, size: 2}}},
+            getFillColor: color,
+            getRadius: plot.size / 2,
+            radiusUnits: 'pixels'
+        }));
+    }
+});
+new deck.DeckGL({
+    container: container,
+    views: new deck.OrthographicView({flipY: false}),
+    initialViewState: {target: [0.5, 0.5, 0],
+                       zoom: [Math.log2(container.clientWidth), Math.log2(container.clientHeight)]},
+    controller: true,
+    layers: layers
+});
+</script>
+</body>
+</html>
+""")
 
     def __init__(self, layout=None, vertical_spacing=None, horizontal_spacing=None, layout_specs=None, title=None,
                  subplot_titles=None, legend=None, white_background=False, font_family=None, font_size=None,
-                 font_color=None):
+                 font_color=None, backend='plotly'):
         """
         Initialise a Plotter object with the layout for a figure.
 
@@ -61,7 +554,16 @@ class Plotter(object):
         :param font_color:
             Optional. Sets the global font color. Named CSS colors may be specified. For example, see:
             https://developer.mozilla.org/en-US/docs/Web/CSS/color_value Default of None indicates '#444'
+        :param backend:
+            Optional. 'plotly' to draw the figure with Plotly or 'deckgl' to draw it with deck.gl, which is much faster
+            for millions of points. The deck.gl backend only supports a single plot without a layout with the 'scatter',
+            'mean' and 'mean_and_uncert' plot types. It draws the markers and lines of the plots, but not the axes,
+            legend or uncertainties. Default is 'plotly'.
         """
+        if backend not in ('plotly', 'deckgl'):
+            raise ValueError('Backend not recognized.')
+        if backend == 'deckgl' and layout is not None:
+            raise ValueError('The deckgl backend does not support figures with a layout.')
         if layout is None:
             # There is one single plot in the figure.
             self._fig = go.Figure()
@@ -71,27 +573,57 @@ class Plotter(object):
             self._fig = make_subplots(rows, cols, horizontal_spacing=horizontal_spacing,
                                       vertical_spacing=vertical_spacing, specs=layout_specs,
                                       subplot_titles=subplot_titles)
+            # Give the legend group for each subplot a unique identifier so that the legend is grouped by plots.
+            self._lg_grid = [[chr(97 + r * cols + c) for c in range(cols)] for r in range(rows)]
         # Set the title, whether to show the legend and the global font properties.
-        self._fig.update_layout(
-            dict(
-                title=title,
-                showlegend=legend,
-                font = dict(
-                    family=font_family,
-                    size=font_size,
-                    color=font_color
-                )
+        layout_dict = dict(
+            title=title,
+            showlegend=legend,
+            font=dict(
+                family=font_family,
+                size=font_size,
+                color=font_color
             )
         )
         if white_background:
-            # Set the background of the whole figure to white.
-            self._fig.update_layout({
+            # Set the background of the whole figure to white, the colours of the axis and zero lines to black and the
+            # colour of the grid lines to very light grey. These are set in the same update as the rest of the layout,
+            # since each update validates the whole layout.
+            axis_colors = dict(
+                linecolor='black',
+                zerolinecolor='black',
+                gridcolor='#CDCDCD'
+            )
+            layout_dict.update({
                 'plot_bgcolor': 'white',
                 'paper_bgcolor': 'white'
             })
+            if layout is None:
+                layout_dict.update(xaxis=axis_colors, yaxis=axis_colors)
+        self._fig.update_layout(layout_dict)
+        if white_background and layout is not None:
+            # With subplots the colours apply to the axes of every subplot.
+            self._fig.update_xaxes(axis_colors)
+            self._fig.update_yaxes(axis_colors)
         # Store the layout and whether the figure has a white background for future reference.
         self._layout = layout
         self._white_background = white_background
+        self._backend = backend
+        # The colorbars of subplots keyed by the type of subplot and position.
+        self._colorbar_cache = {}
+        # The names of the axes of subplots keyed by position.
+        self._axis_names = {}
+        # The method creating the trace for each plot type, so that each trace only needs a single lookup.
+        self._dispatch = {
+            None: self._create_scatter,
+            'scatter': self._create_scatter,
+            'mean': partial(self._create_mean_or_uncert, with_uncert=False),
+            'mean_and_uncert': partial(self._create_mean_or_uncert, with_uncert=True),
+            'hist2d': self._create_hist2d,
+            'scattergeo': self._create_scattergeo,
+            'scattermapbox': self._create_scattermapbox,
+            'densitymapbox': self._create_densitymapbox
+        }
 
     def create_plot(self, x, y, z=None, e=None, plot_type=None, marker_type=None, marker_size=None, nbins=None,
                     cmin=None, cmax=None, data_flags=None, flags=None, plot_label=None, xlabel=None, ylabel=None,
@@ -99,7 +631,8 @@ class Plotter(object):
                     robust_stats=False, outliers=None, min_n=20, color=None, selected_marker_size=None,
                     selected_marker_color=None, unselected_marker_size=None, unselected_marker_color=None, mode=None,
                     mapbox_style=None, show_x_grid=True, show_y_grid=True, x_zero_line=True, y_zero_line=True,
-                    show_x_axis=True, show_y_axis=True, x_tick_angle=None, y_tick_angle=None):
+                    show_x_axis=True, show_y_axis=True, x_tick_angle=None, y_tick_angle=None, max_points=None,
+                    force_scattergeo=False, merge_overplots=False):
         """
         Add a plot to the figure.
 
@@ -135,7 +668,8 @@ class Plotter(object):
             overplotting is True then apply to all '2dhist'/'mean'/'mean_and_uncert' plots. If an array or a list then
             must have the same number of elements as the number of plots, but only rows corresponding to '2dhist',
             'mean', or 'mean_and_uncert' plots need to contain data. If the value is negative or None then ignore.
-            Default value of None means ignore for all plots.
+            Default value of None means ignore for all plots. 2D histograms of numerical data are binned before they
+            are passed to Plotly with 100 bins on each axis if the number of bins is ignored.
         :param cmin:
             Optional. Minimum value for 2D histogram or map which allows cutting off of the image. Default is no limit.
             If overplot is True and scalar apply to all'2dhist'/'map' plots. If an array or a list then has to have the
@@ -190,7 +724,7 @@ class Plotter(object):
             statistics calculation. Default is no outlier rejection.
         :param min_n:
             Optional. When plotting 'mean' or 'mean_and_uncert' plots the minimum number of points per bin acceptable
-            in calculating statistics.
+            in calculating statistics. Bins with fewer points are not plotted.
         :param color:
             Optional. Define color or color table for each dataset. See, for example, for individual colours:
             https://developer.mozilla.org/en-US/docs/Web/CSS/color_value and for colorscales:
@@ -233,6 +767,21 @@ class Plotter(object):
             Optional. Angle to rotate the x axis labels by. Default of None means no rotation.
         :param y_tick_angle:
             Optional. Angle to rotate the y axis labels by. Default of None means no rotation.
+        :param max_points:
+            Optional. The maximum number of points to plot for 'scatter', 'scattergeo' and 'scattermapbox' plots.
+            Larger data sets are thinned, which makes plots of very large data sets much quicker to draw in the
+            browser. Markers are thinned by plotting every nth point. Lines are downsampled with the
+            Largest-Triangle-Three-Buckets algorithm, which keeps the visual shape of the line. If overplot is True
+            this applies to each plot separately. Default of None means all points are plotted.
+        :param force_scattergeo:
+            Optional. A 'scattergeo' plot in a figure without a layout that has more than 20000 points is drawn as a
+            'scattermapbox' plot, which is much quicker to draw in the browser, with a warning. The points are counted
+            after thinning to max_points. If True it is always drawn as a 'scattergeo' plot. Default is False.
+        :param merge_overplots:
+            Optional. If True and overplot is True, scatter plots of numerical data with a single color, the same marker
+            style and mode, and no labels, uncertainties or z data are combined into a single trace, which is much
+            faster to draw. The plots then share a single legend entry and the points are numbered consecutively across
+            the plots, so the merged plot must not be used with interactive selection. Default is False.
         """
         # If row and col specify the position of the plot on the layout if not None.
         if position is None:
@@ -241,41 +790,87 @@ class Plotter(object):
         else:
             row, col = position
 
+        if self._backend == 'deckgl':
+            if any(t not in _DECKGL_PLOT_TYPES for t in _bcast(plot_type, 1)):
+                raise ValueError('Plot type not supported by the deckgl backend.')
+            # The deck.gl page draws each plot with a single color and marker size.
+            per_plot = _bcast(color, len(x)) + _bcast(marker_size, len(x)) if overplot else [color, marker_size]
+            if not all(_is_single(v) for v in per_plot):
+                raise ValueError('The deckgl backend does not support a color or marker size for each point.')
+
+        if plot_type == 'scattergeo' and self._layout is None and not force_scattergeo:
+            # Count the points that are drawn, which is at most max_points for each plot.
+            n_points = sum(len(xi) if max_points is None else min(len(xi), max_points)
+                           for xi in (x if overplot else [x]))
+            if n_points > _SCATTERGEO_MAX_POINTS:
+                # Scattergeo plots are drawn as SVG, which is very slow for large amounts of data, whereas mapbox plots
+                # use WebGL. A figure with a layout has the type of each subplot fixed, so this is only possible without
+                # a layout.
+                warnings.warn('Scattergeo plot with {} points is drawn as a scattermapbox plot, which ignores '
+                              'marker_type and shows xrange and yrange only approximately. Set force_scattergeo to '
+                              'keep the scattergeo plot.'.format(n_points), stacklevel=2)
+                plot_type = 'scattermapbox'
+                if xrange is not None and yrange is not None:
+                    # Center and zoom the map on the range that would have been shown.
+                    if center is None:
+                        center = [0.5 * (xrange[0] + xrange[1]), 0.5 * (yrange[0] + yrange[1])]
+                    if zoom is None:
+                        zoom = _mapbox_zoom(xrange, yrange)
+
         if overplot:
             # If overplotting the data is expected to be a 2D array with data for each trace in each row. Other
             # parameters are also unpacked if they lists/arrays.
-            for i, (xi, yi) in enumerate(zip(x, y)):
-                zi = None if z is None else z[i]
-                ei = None if e is None else e[i]
-                pt = None if plot_type is None else plot_type if isinstance(plot_type, str) else plot_type[i]
-                pl = None if plot_label is None else plot_label[i]
-                nb = None if nbins is None else nbins if isinstance(nbins, numbers.Number) else nbins[i]
-                cn = None if cmin is None else cmin if isinstance(cmin, numbers.Number) else cmin[i]
-                cx = None if cmax is None else cmax if isinstance(cmax, numbers.Number) else cmax[i]
-                mt = None if marker_type is None else marker_type if isinstance(marker_type, str) else marker_type[i]
-                ms = None if marker_size is None else \
-                    marker_size if isinstance(marker_size, numbers.Number) else marker_size[i]
-                c = None if color is None else color if isinstance(color, str) else color[i]
-                sms = None if selected_marker_size is None else \
-                    selected_marker_size if isinstance(selected_marker_size, numbers.Number) else \
-                        selected_marker_size[i]
-                smc = None if selected_marker_color is None else \
-                    selected_marker_color if isinstance(selected_marker_color, str) else selected_marker_color[i]
-                ums = None if unselected_marker_size is None else \
-                    unselected_marker_size if isinstance(unselected_marker_size, numbers.Number) else \
-                        unselected_marker_size[i]
-                umc = None if unselected_marker_color is None else \
-                    unselected_marker_color if isinstance(unselected_marker_color, str) else unselected_marker_color[i]
-                r = None if radius is None else radius if isinstance(radius, numbers.Number) else radius[i]
-                m = None if mode is None else mode if isinstance(mode, str) else mode[i]
-                # Add each trace at the specified position
-                self._add_trace(row, col, i, pt, xi, yi, zi, ei, pl, c, nb, cn, cx, mt, ms, xrange, yrange, r, sms, smc,
-                                ums, umc, m, robust_stats, min_n, outliers)
+            # Parameters that are a single value applying to all of the plots are expanded once into a list with an
+            # element for each plot, so that each plot only has to index the lists.
+            n = len(x)
+            # If requested, scatter plots with a single color and the same style can be combined into a single trace
+            # with NaNs separating the data of each plot, which is much faster to render than one trace per plot.
+            merge = (merge_overplots and _is_single(plot_type) and plot_type in (None, 'scatter') and
+                     isinstance(color, str) and plot_label is None and z is None and e is None and
+                     all(_is_single(v) for v in (marker_type, marker_size, selected_marker_size, selected_marker_color,
+                                                 unselected_marker_size, unselected_marker_color, mode)) and
+                     all(not np.ma.isMaskedArray(a) and np.asarray(a).dtype.kind in 'iuf' for a in list(x) + list(y)))
+            if merge:
+                # The maximum number of points applies to each plot, so the plots are thinned before they are joined.
+                lines = mode is not None and mode != 'markers'
+                x, y = zip(*(_thin((xi, yi), max_points, lines) for xi, yi in zip(x, y)))
+                trace = self._create_trace(row, col, 0, plot_type, _inject_nans(x), _inject_nans(y), None, None, None,
+                                           color, nbins, cmin, cmax, marker_type, marker_size, xrange, yrange, radius,
+                                           selected_marker_size, selected_marker_color, unselected_marker_size,
+                                           unselected_marker_color, mode, robust_stats, min_n, outliers, None)
+                self._fig.add_trace(trace, row=row, col=col)
+            else:
+                zs = _bcast(z, n)
+                es = _bcast(e, n)
+                pls = _bcast(plot_label, n)
+                pts = _bcast(plot_type, n)
+                nbs = _bcast(nbins, n)
+                cns = _bcast(cmin, n)
+                cxs = _bcast(cmax, n)
+                mts = _bcast(marker_type, n)
+                mss = _bcast(marker_size, n)
+                cs = _bcast(color, n)
+                smss = _bcast(selected_marker_size, n)
+                smcs = _bcast(selected_marker_color, n)
+                umss = _bcast(unselected_marker_size, n)
+                umcs = _bcast(unselected_marker_color, n)
+                rs = _bcast(radius, n)
+                ms = _bcast(mode, n)
+                # Create the trace of each plot and add all of the traces to the figure at the specified position at
+                # once, so that the figure is only validated and updated once.
+                traces = [self._create_trace(row, col, i, pts[i], _asarr(xi), _asarr(yi), _asarr(zs[i]), _asarr(es[i]),
+                                             pls[i], cs[i], nbs[i], cns[i], cxs[i], mts[i], mss[i], xrange, yrange,
+                                             rs[i], smss[i], smcs[i], umss[i], umcs[i], ms[i], robust_stats, min_n,
+                                             outliers, max_points)
+                          for i, (xi, yi) in enumerate(zip(x, y))]
+                self._fig.add_traces(traces, rows=row, cols=col)
         else:
             # Add the trace at the specified position
-            self._add_trace(row, col, None, plot_type, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
-                            marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
-                            unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers)
+            trace = self._create_trace(row, col, None, plot_type, _asarr(x), _asarr(y), _asarr(z), _asarr(e),
+                                       plot_label, color, nbins, cmin, cmax, marker_type, marker_size, xrange, yrange,
+                                       radius, selected_marker_size, selected_marker_color, unselected_marker_size,
+                                       unselected_marker_color, mode, robust_stats, min_n, outliers, max_points)
+            self._fig.add_trace(trace, row=row, col=col)
 
         # Update the layout of the plot with the axis labels and ranges. If no layout is specified this is done using
         # the update_layout method of the figure, otherwise it must be done using a method specific to the axis type of
@@ -338,37 +933,87 @@ class Plotter(object):
                                showline=show_y_axis,
                                tickangle=y_tick_angle)
                 )
-                if self._white_background:
-                    # If the figure has a white background change the colours of the axis and zero lines to black and
-                    # the colour of the grid lines to very light grey.
-                    self._fig.update_layout(
-                        xaxis=dict(
-                            linecolor='black',
-                            zerolinecolor='black',
-                            gridcolor='#CDCDCD'
-                        ),
-                        yaxis=dict(
-                            linecolor='black',
-                            zerolinecolor='black',
-                            gridcolor='#CDCDCD'
-                        )
-                    )
             else:
-                self._fig.update_xaxes(title_text=xlabel, range=xrange, showgrid=show_x_grid,
-                                       zeroline=x_zero_line, showline=show_x_axis, tickangle=x_tick_angle,
-                                       row=row, col=col)
-                self._fig.update_yaxes(title_text=ylabel, range=yrange, showgrid=show_y_grid,
-                                       zeroline=y_zero_line, showline=show_y_axis, tickangle=y_tick_angle,
-                                       row=row, col=col)
-                if self._white_background:
-                    self._fig.update_xaxes(linecolor='black', zerolinecolor='black', gridcolor='#CDCDCD')
-                    self._fig.update_yaxes(linecolor='black', zerolinecolor='black', gridcolor='#CDCDCD')
-
-    def _add_trace(self, row, col, i, plot_type, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
-                   marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
-                   unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers):
-        """
-        Add a trace to a figure.
+                # Both axes of the subplot are updated in a single update of the layout using the names of the axes,
+                # rather than selecting each axis from the figure.
+                axis_names = self._get_axis_names(row, col)
+                if axis_names is not None:
+                    xaxis_name, yaxis_name = axis_names
+                    self._fig.update_layout({
+                        xaxis_name: dict(title=dict(text=xlabel),
+                                         range=xrange,
+                                         showgrid=show_x_grid,
+                                         zeroline=x_zero_line,
+                                         showline=show_x_axis,
+                                         tickangle=x_tick_angle),
+                        yaxis_name: dict(title=dict(text=ylabel),
+                                         range=yrange,
+                                         showgrid=show_y_grid,
+                                         zeroline=y_zero_line,
+                                         showline=show_y_axis,
+                                         tickangle=y_tick_angle)
+                    })
+
+    def _get_axis_names(self, row, col):
+        """
+        Get the names of the axes of a subplot in the layout of the figure, e.g. 'xaxis2' and 'yaxis2'. Subplots with
+        more than one span or with maps do not follow the order of the grid, so the names are taken from the figure and
+        stored for future reference.
+
+        :param row:
+            Row position in the figure.
+        :param col:
+            Column position in the figure.
+        :return:
+            The names of the x and y axes, or None if the subplot does not have Cartesian axes.
+        """
+        if (row, col) not in self._axis_names:
+            subplot = self._fig.get_subplot(row, col)
+            if hasattr(subplot, 'xaxis') and hasattr(subplot, 'yaxis'):
+                self._axis_names[row, col] = (subplot.xaxis.plotly_name, subplot.yaxis.plotly_name)
+            else:
+                self._axis_names[row, col] = None
+        return self._axis_names[row, col]
+
+    def _get_colorbar(self, kind, row, col, i):
+        """
+        Get the colorbar positioned next to a subplot in the figure. The domains of the subplots do not change once the
+        figure has been created, so the colorbar is created once for each subplot and stored for future reference
+        rather than searching the layout for the domain of the subplot for every trace. Plotly copies the colorbar into
+        each trace, so the same dictionary can be used for all of the traces of a subplot.
+
+        :param kind:
+            The kind of subplot. 'xy' for Cartesian axes, 'geo' for a geo map or 'mapbox' for a mapbox map.
+        :param row:
+            Row position in the figure.
+        :param col:
+            Column position in the figure.
+        :param i:
+            The index of the subplot at the position.
+        :return:
+            A dictionary specifying the positioning of the colorbar.
+        """
+        key = (kind, row, col, i)
+        if key not in self._colorbar_cache:
+            if kind == 'xy':
+                xdomain = list(self._fig.select_xaxes(row=row, col=col))[i]['domain']
+                ydomain = list(self._fig.select_yaxes(row=row, col=col))[i]['domain']
+            else:
+                if kind == 'geo':
+                    subplots = self._fig.select_geos(row=row, col=col)
+                else:
+                    subplots = self._fig.select_mapboxes(row=row, col=col)
+                domain = list(subplots)[i]['domain']
+                xdomain = domain['x']
+                ydomain = domain['y']
+            self._colorbar_cache[key] = self.get_colorbar(xdomain, ydomain)
+        return self._colorbar_cache[key]
+
+    def _create_trace(self, row, col, i, plot_type, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
+                      marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
+                      unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers, max_points):
+        """
+        Create a trace to be added to the figure.
 
         :param row:
             Row position in the figure. May be None if only one plot in figure.
@@ -422,185 +1067,378 @@ class Plotter(object):
             See docstring of create_plot method.
         :param outliers:
             See docstring of create_plot method.
+        :param max_points:
+            See docstring of create_plot method.
+        :return:
+            The trace.
         """
-        # Give the legend group for this subplot a unique identifier so that the legend is grouped by plots.
-        lg = None if self._layout is None else chr(97 + (row - 1) * self._layout[0] + (col - 1))
+        lg = None if self._layout is None else self._lg_grid[row - 1][col - 1]
         # A negative number of bins is equivalent to nbins is None.
-        if type(nbins) is int and nbins < 0:
+        if isinstance(nbins, (int, np.integer)) and nbins < 0:
             nbins = None
         # A negative cutoff is equivalent to cutoff is None.
-        if type(cmin) is int and cmin < 0:
+        if isinstance(cmin, (int, np.integer)) and cmin < 0:
             cmin = None
-        if type(cmax) is int and cmax < 0:
+        if isinstance(cmax, (int, np.integer)) and cmax < 0:
             cmax = None
-        if plot_type is None or plot_type == 'scatter':
-            trace = self.create_scatter_plot(x, y, e, mode, color, marker_size, marker_type, selected_marker_color,
-                                             selected_marker_size, unselected_marker_color, unselected_marker_size,
-                                             plot_label, lg)
-        elif plot_type == 'mean' or plot_type == 'mean_and_uncert':
-            if np.ma.is_masked(y) or np.ma.is_masked(x):
-                mask = y.mask
-                assert (x.mask == mask).all(), 'X and Y have different masks.'
-                x = x.data[~mask]
-                y = y.data[~mask]
-            # Bin the data and take means
-            if nbins is None:
-                nbins = 'auto'
-            hist, bin_edges = np.histogram(x, bins=nbins, range=xrange)
+        try:
+            add = self._dispatch[plot_type]
+        except (KeyError, TypeError):
+            raise ValueError('Plot type not recognized.')
+        return add(row, col, i, lg, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type, marker_size, xrange,
+                   yrange, radius, selected_marker_size, selected_marker_color, unselected_marker_size,
+                   unselected_marker_color, mode, robust_stats, min_n, outliers, max_points)
+
+    def _create_scatter(self, row, col, i, lg, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
+                        marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
+                        unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers,
+                        max_points):
+        """
+        Create the trace for a scatter plot. See docstring of _create_trace method for the parameters.
+
+        :return:
+            The trace.
+        """
+        return self.create_scatter_plot(x, y, e, mode, color, marker_size, marker_type, selected_marker_color,
+                                        selected_marker_size, unselected_marker_color, unselected_marker_size,
+                                        plot_label, lg, max_points)
+
+    def _create_mean_or_uncert(self, row, col, i, lg, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
+                               marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
+                               unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers,
+                               max_points, with_uncert):
+        """
+        Create the trace for a mean plot or a mean and uncertainty plot. See docstring of _create_trace method for the
+        parameters.
+
+        :param with_uncert:
+            Whether to include the uncertainty on the mean.
+        :return:
+            The trace.
+        """
+        # Strip the masked data once so that the binning works on plain arrays. A point is dropped if either its x or
+        # its y value is masked.
+        if np.ma.isMaskedArray(x) or np.ma.isMaskedArray(y):
+            keep = ~(np.ma.getmaskarray(x) | np.ma.getmaskarray(y))
+            x = np.ma.getdata(x)[keep]
+            y = np.ma.getdata(y)[keep]
+        # Bin the data and take means
+        if nbins is None:
+            nbins = 'auto'
+        bin_edges = np.histogram_bin_edges(x, bins=nbins, range=xrange)
+        # Bins given as a number or a binning strategy are equally spaced, so the bin of each value can be calculated
+        # directly rather than searched for.
+        digitized = self.get_bin_indices(x, bin_edges, uniform=np.ndim(nbins) == 0)
+        n_bin_edges = len(bin_edges)
+        # As with np.histogram the last bin includes its upper edge.
+        digitized[x == bin_edges[-1]] = n_bin_edges - 1
+        # Index 0 and n_bin_edges of digitized are below and above the range of the bins respectively and are dropped
+        # from the per bin counts and sums.
+        counts = np.bincount(digitized, minlength=n_bin_edges + 1)
+        hist = counts[1:n_bin_edges]
+        if robust_stats:
             assert hist.max() >= min_n, 'Insufficient number of data points per bin.'
-            digitized = np.digitize(x, bin_edges)
-            n_bin_edges = len(bin_edges)
-            if robust_stats:
-                nbins = n_bin_edges - 1
-                binned_data = [y[digitized == i] for i in range(1, n_bin_edges)]
-                means, uncert = self.calculate_robust_statistics(y, hist, binned_data, nbins)
-                if outliers is not None:
-                    binned_data = [binned_data[i][(binned_data[i] - means[i]) / uncert[i] < outliers]
-                                   for i in range(nbins)]
-                    hist = np.array([len(binned_data[i]) for i in range(nbins)])
-                    assert hist.max() >= min_n, 'Insufficient number of data points per bin after outlier rejection.'
-                    means, uncert = self.calculate_robust_statistics(y, hist, binned_data, nbins)
-            else:
-                means = np.array([y[digitized == i].mean() for i in range(1, n_bin_edges)])
-            bin_centres = np.mean(np.vstack([bin_edges[0:-1], bin_edges[1:]]), axis=0)
-            if plot_type == 'mean':
-                uncert = None
-            else:
-                if not robust_stats:
-                    stds = np.array([y[digitized == i].std() for i in range(1, n_bin_edges)])
-                    uncert = stds / np.sqrt(hist)
-            trace = self.create_scatter_plot(bin_centres, means, uncert, mode, color, marker_size, marker_type,
-                                             selected_marker_color, selected_marker_size, unselected_marker_color,
-                                             unselected_marker_size, plot_label, lg)
-        elif plot_type == 'hist2d':
-            # Add a trace for a 2D histogram.
-            if self._layout is None:
-                colorbar = None
-            else:
-                # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the
-                # right of the whole figure.
-                if i is None:
-                    i = 0
-                xdomain = list(self._fig.select_xaxes(row=row, col=col))[i]['domain']
-                ydomain = list(self._fig.select_yaxes(row=row, col=col))[i]['domain']
-                colorbar = self.get_colorbar(xdomain, ydomain)
-            # Unpack the number of bins and range into X and Y components if appropriate.
-            nbinsx = None if nbins is None else nbins if type(nbins) is int else nbins[0]
-            nbinsy = None if nbins is None else nbins if type(nbins) is int else nbins[1]
+            # Sort the data by bin once so that the data for each bin is a contiguous slice of the sorted array. A
+            # stable sort of 16 bit integers is a radix sort, which is much faster than sorting the data by x.
+            bin_ids = digitized.astype(np.int16) if n_bin_edges < np.iinfo(np.int16).max else digitized
+            order = np.argsort(bin_ids, kind='stable')
+            bin_ends = np.cumsum(counts)
+            means, uncert, hist = self.calculate_robust_statistics(y[order], (bin_ends - counts)[1:n_bin_edges],
+                                                                   bin_ends[1:n_bin_edges], hist, outliers)
+            # Only bins with enough data points are plotted.
+            valid = hist >= min_n
+            if outliers is not None:
+                assert valid.any(), 'Insufficient number of data points per bin after outlier rejection.'
+            means = means[valid]
+            uncert = uncert[valid]
+        else:
+            # Only bins with enough data points are plotted, which also avoids dividing by zero for empty bins.
+            valid = hist >= min_n
+            assert valid.any(), 'Insufficient number of data points per bin.'
+            # Per bin sums in a single pass over the data rather than masking the data once for each bin.
+            sums = np.bincount(digitized, weights=y, minlength=n_bin_edges + 1)[1:n_bin_edges]
+            means = sums[valid] / hist[valid]
+            if with_uncert:
+                # Deviations are taken from the bin means rather than using the sum of squares to avoid loss of
+                # precision when the spread of a bin is small compared to its mean. The means are looked up by bin
+                # index, so the out of range and dropped bins are padded with NaN.
+                bin_means = np.full(n_bin_edges + 1, np.nan)
+                bin_means[1:n_bin_edges][valid] = means
+                sqdevs = np.bincount(digitized, weights=(y - bin_means[digitized]) ** 2,
+                                     minlength=n_bin_edges + 1)[1:n_bin_edges]
+                uncert = np.sqrt(sqdevs[valid] / hist[valid]) / np.sqrt(hist[valid])
+        bin_centres = 0.5 * (bin_edges[:-1] + bin_edges[1:])[valid]
+        if not with_uncert:
+            uncert = None
+        return self.create_scatter_plot(bin_centres, means, uncert, mode, color, marker_size, marker_type,
+                                        selected_marker_color, selected_marker_size, unselected_marker_color,
+                                        unselected_marker_size, plot_label, lg)
+
+    def _create_hist2d(self, row, col, i, lg, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
+                       marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
+                       unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers,
+                       max_points):
+        """
+        Create the trace for a 2D histogram. See docstring of _create_trace method for the parameters.
+
+        :return:
+            The trace.
+        """
+        if self._layout is None:
+            colorbar = None
+        else:
+            # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the right
+            # of the whole figure.
+            if i is None:
+                i = 0
+            colorbar = self._get_colorbar('xy', row, col, i)
+        # Unpack the number of bins and range into X and Y components if appropriate. A single number of bins, which
+        # may be a NumPy integer, applies to both axes.
+        if nbins is None:
+            nbinsx = nbinsy = None
+        elif np.ndim(nbins) == 0:
+            nbinsx = nbinsy = int(nbins)
+        else:
+            nbinsx, nbinsy = nbins
+        if np.asarray(x).dtype.kind not in 'iuf' or np.asarray(y).dtype.kind not in 'iuf':
+            # Data that is not numerical, such as times, is binned by Plotly.
             startx, endx = (None, None) if xrange is None else xrange
             starty, endy = (None, None) if yrange is None else yrange
-            trace = go.Histogram2d(x=x, y=y, colorscale=color, colorbar=colorbar, nbinsx=nbinsx, nbinsy=nbinsy,
-                                   zmin=cmin, zmax=cmax, xbins=dict(start=startx, end=endx),
-                                   ybins=dict(start=starty, end=endy), legendgroup=lg, name=plot_label)
-        elif plot_type == 'scattergeo':
-            if self._layout is None:
-                colorbar = dict(titleside='right')
-            else:
-                # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the
-                # right of the whole figure.
-                if i is None:
-                    i = 0
-                domain = list(self._fig.select_geos(row=row, col=col))[i]['domain']
-                xdomain = domain['x']
-                ydomain = domain['y']
-                colorbar = self.get_colorbar(xdomain, ydomain)
-            trace = go.Scattergeo(
-                lon=x,
-                lat=y,
-                marker=dict(
-                    color=z,
-                    colorscale=color,
-                    cmin=cmin,
-                    cmax=cmax,
-                    colorbar=colorbar,
-                    symbol=marker_type,
-                    size=marker_size
-                ),
-                selected=dict(marker=dict(size=selected_marker_size,
-                                          color=selected_marker_color)),
-                unselected=dict(marker=dict(size=unselected_marker_size,
-                                            color=unselected_marker_color)),
-                legendgroup=lg,
-                name=plot_label
-            )
-        elif plot_type == 'scattermapbox':
-            if self._layout is None:
-                colorbar = dict(titleside='right')
-            else:
-                # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the
-                # right of the whole figure.
-                if i is None:
-                    i = 0
-                domain = list(self._fig.select_mapboxes(row=row, col=col))[i]['domain']
-                xdomain = domain['x']
-                ydomain = domain['y']
-                colorbar = self.get_colorbar(xdomain, ydomain)
-            trace = go.Scattermapbox(
-                lon=x,
-                lat=y,
-                marker=dict(
-                    color=z,
-                    colorscale=color,
-                    cmin=cmin,
-                    cmax=cmax,
-                    colorbar=colorbar,
-                    size=marker_size
-                ),
-                selected=dict(marker=dict(size=selected_marker_size,
-                                          color=selected_marker_color)),
-                unselected=dict(marker=dict(size=unselected_marker_size,
-                                            color=unselected_marker_color)),
-                legendgroup=lg,
-                name=plot_label
-            )
-        elif plot_type == 'densitymapbox':
-            if self._layout is None:
-                colorbar = dict(titleside='right')
-            else:
-                # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the
-                # right of the whole figure.
-                if i is None:
-                    i = 0
-                domain = list(self._fig.select_mapboxes(row=row, col=col))[i]['domain']
-                xdomain = domain['x']
-                ydomain = domain['y']
-                colorbar = self.get_colorbar(xdomain, ydomain)
-            trace = go.Densitymapbox(
-                lon=x,
-                lat=y,
-                z=z,
+            return go.Histogram2d(x=x, y=y, colorscale=color, colorbar=colorbar, nbinsx=nbinsx, nbinsy=nbinsy,
+                                  zmin=cmin, zmax=cmax, xbins=dict(start=startx, end=endx),
+                                  ybins=dict(start=starty, end=endy), legendgroup=lg, name=plot_label)
+        # Numerical data is binned here and plotted as a heatmap of the counts, so that only the counts in the bins are
+        # passed to Plotly rather than every data point.
+        hist, xedges, yedges = self.calculate_histogram2d(x, y, _HIST2D_DEFAULT_BINS if nbinsx is None else nbinsx,
+                                                          _HIST2D_DEFAULT_BINS if nbinsy is None else nbinsy, xrange,
+                                                          yrange)
+        return go.Heatmap(z=hist.T, x=0.5 * (xedges[:-1] + xedges[1:]), y=0.5 * (yedges[:-1] + yedges[1:]),
+                          colorscale=color, colorbar=colorbar, zmin=cmin, zmax=cmax, legendgroup=lg, name=plot_label)
+
+    def _create_scattergeo(self, row, col, i, lg, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
+                           marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
+                           unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers,
+                           max_points):
+        """
+        Create the trace for a scattergeo map. See docstring of _create_trace method for the parameters.
+
+        :return:
+            The trace.
+        """
+        if z is None:
+            # The markers are not colored by z data, so there is no colorbar to position.
+            colorbar = None
+        elif self._layout is None:
+            colorbar = dict(titleside='right')
+        else:
+            # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the right
+            # of the whole figure.
+            if i is None:
+                i = 0
+            colorbar = self._get_colorbar('geo', row, col, i)
+        x, y, z = _thin((x, y, z), max_points)
+        if len(x) > _FLOAT32_MIN_POINTS:
+            # See create_scatter_plot.
+            x, y, z = _to_float32(x), _to_float32(y), _to_float32(z)
+        return go.Scattergeo(
+            lon=x,
+            lat=y,
+            marker=dict(
+                color=z,
                 colorscale=color,
-                zmin=cmin,
-                zmax=cmax,
+                cmin=cmin,
+                cmax=cmax,
                 colorbar=colorbar,
-                radius=radius,
-                legendgroup=lg,
-                name=plot_label
-            )
+                symbol=marker_type,
+                size=marker_size
+            ),
+            selected=_selection(selected_marker_size, selected_marker_color),
+            unselected=_selection(unselected_marker_size, unselected_marker_color),
+            legendgroup=lg,
+            name=plot_label
+        )
+
+    def _create_scattermapbox(self, row, col, i, lg, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
+                              marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
+                              unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers,
+                              max_points):
+        """
+        Create the trace for a scattermapbox map. See docstring of _create_trace method for the parameters.
+
+        :return:
+            The trace.
+        """
+        if z is None:
+            # The markers are not colored by z data, so there is no colorbar to position.
+            colorbar = None
+        elif self._layout is None:
+            colorbar = dict(titleside='right')
         else:
-            raise ValueError('Plot type not recognized.')
-        # Add the plot to the figure.
-        self._fig.add_trace(trace, row=row, col=col)
+            # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the right
+            # of the whole figure.
+            if i is None:
+                i = 0
+            colorbar = self._get_colorbar('mapbox', row, col, i)
+        x, y, z = _thin((x, y, z), max_points)
+        if len(x) > _FLOAT32_MIN_POINTS:
+            # See create_scatter_plot.
+            x, y, z = _to_float32(x), _to_float32(y), _to_float32(z)
+        return go.Scattermapbox(
+            lon=x,
+            lat=y,
+            marker=dict(
+                color=z,
+                colorscale=color,
+                cmin=cmin,
+                cmax=cmax,
+                colorbar=colorbar,
+                size=marker_size
+            ),
+            selected=_selection(selected_marker_size, selected_marker_color),
+            unselected=_selection(unselected_marker_size, unselected_marker_color),
+            legendgroup=lg,
+            name=plot_label
+        )
+
+    def _create_densitymapbox(self, row, col, i, lg, x, y, z, e, plot_label, color, nbins, cmin, cmax, marker_type,
+                              marker_size, xrange, yrange, radius, selected_marker_size, selected_marker_color,
+                              unselected_marker_size, unselected_marker_color, mode, robust_stats, min_n, outliers,
+                              max_points):
+        """
+        Create the trace for a densitymapbox map. See docstring of _create_trace method for the parameters.
+
+        :return:
+            The trace.
+        """
+        if self._layout is None:
+            colorbar = dict(titleside='right')
+        else:
+            # If the plot is a subplot, position the colorbar next to the individual subplot rather than to the right
+            # of the whole figure.
+            if i is None:
+                i = 0
+            colorbar = self._get_colorbar('mapbox', row, col, i)
+        if len(x) > _FLOAT32_MIN_POINTS:
+            # See create_scatter_plot.
+            x, y, z = _to_float32(x), _to_float32(y), _to_float32(z)
+        return go.Densitymapbox(
+            lon=x,
+            lat=y,
+            z=z,
+            colorscale=color,
+            zmin=cmin,
+            zmax=cmax,
+            colorbar=colorbar,
+            radius=radius,
+            legendgroup=lg,
+            name=plot_label
+        )
+
+    @staticmethod
+    def get_bin_indices(x, bin_edges, uniform=False):
+        """
+        Find the bin of each value of x. The indices are in the same form as those returned by np.digitize, so values
+        below the first bin edge have an index of 0 and values equal to or above the last bin edge have an index of
+        len(bin_edges).
+
+        :param x:
+            The data to be binned.
+        :param bin_edges:
+            The monotonically increasing bin edges.
+        :param uniform:
+            Optional. Whether the bins are equally spaced, in which case the bin of each value is calculated directly
+            instead of by a binary search of the bin edges.
+        :return:
+            An array of bin indices.
+        """
+        x = np.asarray(x)
+        if not uniform:
+            return np.searchsorted(bin_edges, x, side='right')
+        nbins = len(bin_edges) - 1
+        with np.errstate(invalid='ignore', over='ignore'):
+            scaled = (x - bin_edges[0]) * (nbins / (bin_edges[-1] - bin_edges[0]))
+            # Clip before converting to integers, as values far outside the range of the bins, such as fill values or
+            # infinity, do not fit in an integer. NaN is left as is and dealt with below.
+            np.clip(scaled, 0, nbins - 1, out=scaled)
+            indices = scaled.astype(np.intp)
+        np.clip(indices, 0, nbins - 1, out=indices)
+        # Correct for values outside the range of the bins and for rounding errors at the bin edges, so that the
+        # result is the same as a search of the bin edges.
+        indices[x < bin_edges[indices]] -= 1
+        indices[x >= bin_edges[indices + 1]] += 1
+        if x.dtype.kind == 'f':
+            indices[np.isnan(x)] = nbins
+        return indices + 1
 
     @classmethod
-    def calculate_robust_statistics(cls, y, hist, binned_data, nbins):
+    def calculate_robust_statistics(cls, y_sorted, bin_starts, bin_ends, hist, outliers=None):
         """
-        Calculate robust statistics.
-        :param y:
+        Calculate robust statistics. If Numba is available this is done in compiled code in parallel over the bins,
+        otherwise for all of the bins at once with vectorised NumPy.
+        :param y_sorted:
+            The data sorted by bin.
+        :param bin_starts:
+            The index of the start of each bin in y_sorted.
+        :param bin_ends:
+            The index of the end of each bin in y_sorted.
         :param hist:
-        :param binned_data:
-        :param nbins:
+            The number of data points in each bin.
+        :param outliers:
+            Optional. Threshold for outlier rejection. See docstring of create_plot method.
+        :return:
+            The median, the robust standard deviation divided by the square root of the number of points and the
+            number of points in each bin after any outlier rejection.
+        """
+        return _robust_bin_stats(np.ascontiguousarray(y_sorted, dtype=np.float64),
+                                 np.ascontiguousarray(bin_starts, dtype=np.int64),
+                                 np.ascontiguousarray(bin_ends, dtype=np.int64),
+                                 np.ascontiguousarray(hist, dtype=np.int64),
+                                 np.inf if outliers is None else float(outliers))
+
+    @classmethod
+    def calculate_histogram2d(cls, x, y, nbinsx, nbinsy, xrange=None, yrange=None):
+        """
+        Calculate a 2D histogram of numerical data in the same way as np.histogram2d, but with the bins of each point
+        calculated directly from the equally spaced bins. Masked and non-finite values are ignored, as are values
+        outside the range of the bins such as fill values.
+
+        :param x:
+            The data for the x-ordinate.
+        :param y:
+            The data for the y-ordinate.
+        :param nbinsx:
+            The number of bins in x.
+        :param nbinsy:
+            The number of bins in y.
+        :param xrange:
+            Optional. The range of the bins in x as [xlow, xhigh]. Default is the range of the data.
+        :param yrange:
+            Optional. The range of the bins in y as [ylow, yhigh]. Default is the range of the data.
         :return:
-            The median and the robust standard deviation.
+            The number of points in each bin with x along the first axis, the bin edges in x and the bin edges in y.
         """
-        means = np.array([np.median(binned_data[i]) for i in range(nbins)])
-        stds = np.array([np.subtract(*np.percentile(binned_data[i], [75, 25])) / 1.349 for i in range(nbins)])
-        uncert = stds / np.sqrt(hist)
-        return means, uncert
+        keep = ~(np.ma.getmaskarray(x) | np.ma.getmaskarray(y))
+        x = np.ma.getdata(x).astype(np.float64)
+        y = np.ma.getdata(y).astype(np.float64)
+        keep &= np.isfinite(x) & np.isfinite(y)
+        x = x[keep]
+        y = y[keep]
+        xedges = np.histogram_bin_edges(x, nbinsx, range=xrange)
+        yedges = np.histogram_bin_edges(y, nbinsy, range=yrange)
+        xbins = cls.get_bin_indices(x, xedges, uniform=True)
+        ybins = cls.get_bin_indices(y, yedges, uniform=True)
+        # As with np.histogram the last bin includes its upper edge.
+        xbins[x == xedges[-1]] = nbinsx
+        ybins[y == yedges[-1]] = nbinsy
+        # Values outside the bins, including very large fill values, have index 0 or nbins + 1 and are not counted.
+        inside = (xbins >= 1) & (xbins <= nbinsx) & (ybins >= 1) & (ybins <= nbinsy)
+        hist = np.bincount((xbins[inside] - 1) * nbinsy + ybins[inside] - 1, minlength=nbinsx * nbinsy)
+        return hist.reshape(nbinsx, nbinsy), xedges, yedges
 
     @classmethod
     def create_scatter_plot(cls, x, y, e, mode, color, marker_size, marker_type, selected_marker_color,
-                            selected_marker_size, unselected_marker_color, unselected_marker_size, plot_label, lg):
+                            selected_marker_size, unselected_marker_color, unselected_marker_size, plot_label, lg,
+                            max_points=None):
         """
         Create a scatter plot or line plot. Needed for the case of mean and mean and uncertainty plots as well as
         scatter plots.
@@ -618,8 +1456,16 @@ class Plotter(object):
         :param plot_label:
         :param lg:
             The legend group of the plot.
+        :param max_points:
+            Optional. The maximum number of points to plot. See docstring of create_plot method.
         :return:
         """
+        x, y, e = _thin((x, y, e), max_points, lines=mode is not None and mode != 'markers')
+        if len(x) > _FLOAT32_MIN_POINTS:
+            # Large amounts of data are passed to Plotly as contiguous float32 arrays where this loses no precision,
+            # which halves the memory used and is quicker to serialise with the orjson engine of Plotly.
+            x = _to_float32(x)
+            y = _to_float32(y)
         if e is None:
             error = None
         else:
@@ -632,20 +1478,16 @@ class Plotter(object):
             trace = go.Scattergl(x=x, y=y, mode='markers', marker={'symbol': marker_type,
                                                                    'color': color,
                                                                    'size': marker_size},
-                                 selected={'marker': {'size': selected_marker_size,
-                                                      'color': selected_marker_color}},
-                                 unselected={'marker': {'size': unselected_marker_size,
-                                                        'color': unselected_marker_color}},
+                                 selected=_selection(selected_marker_size, selected_marker_color),
+                                 unselected=_selection(unselected_marker_size, unselected_marker_color),
                                  error_y=error,
                                  legendgroup=lg, name=plot_label)
         elif mode == 'lines+markers':
             trace = go.Scattergl(x=x, y=y, line={'color': color}, marker={'symbol': marker_type,
                                                                           'color': color,
                                                                           'size': marker_size},
-                                 selected={'marker': {'size': selected_marker_size,
-                                                      'color': selected_marker_color}},
-                                 unselected={'marker': {'size': unselected_marker_size,
-                                                        'color': unselected_marker_color}},
+                                 selected=_selection(selected_marker_size, selected_marker_color),
+                                 unselected=_selection(unselected_marker_size, unselected_marker_color),
                                  error_y=error,
                                  mode='lines+markers', name=plot_label, legendgroup=lg)
         elif mode == 'lines':
@@ -678,7 +1520,8 @@ class Plotter(object):
     def show_plot(self, height=None, width=None, match_xaxes=False, match_yaxes=False, interactive_selection=False,
                   jupyter=True):
         """
-        Display the plot for testing or interactive analysis.
+        Display the plot for testing or interactive analysis. With the deckgl backend the page is opened in the browser,
+        matching axes and interactive selection are not supported and jupyter is ignored.
 
         :param height:
             Optional. The height of the figure in pixels.
@@ -696,6 +1539,15 @@ class Plotter(object):
             the selected point indices will be saved to SELECTED_POINTS_INDS in the notebook on selection.
         :return:
         """
+        if self._backend == 'deckgl':
+            if match_xaxes or match_yaxes or interactive_selection:
+                raise ValueError('The deckgl backend does not support matching axes or interactive selection.')
+            # Write the page to a temporary file and open it in the browser, in the same way as the browser renderer
+            # of Plotly.
+            with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False) as f:
+                f.write(self._get_deckgl_html(height, width))
+            webbrowser.open('file://' + f.name)
+            return
         # Update the height and width of the plot in pixels.
         self._fig.update_layout(
             dict(
@@ -711,53 +1563,9 @@ class Plotter(object):
             self._fig.update_yaxes(matches='y')
 
         if interactive_selection:
-            # Create JavaScript event handlers, which link the selection between plots and if in a Jupyter notebook
-            # save the point indices to a variable in the notebook.
-            if jupyter:
-                js = """
-                var ele = document.getElementById("{plot_id}");
-                ele.on('plotly_selected', function(eventData){
-                    var selectedpoints = [];
-                    IPython.notebook.kernel.execute('SELECTED_POINT_INDS = []')
-    
-                    eventData.points.forEach(function(pt) {
-                        selectedpoints.push(pt.pointNumber);
-                        IPython.notebook.kernel.execute('SELECTED_POINT_INDS.append(' + pt.pointNumber.toString() +')')
-                    });
-                    var update = {
-                        'selectedpoints': [selectedpoints]
-                    };
-                    Plotly.restyle("{plot_id}", update)
-                });
-                ele.on('plotly_deselect', function(){
-                    var update = {
-                        'selectedpoints': [null]
-                    };
-                    Plotly.restyle("{plot_id}", update)
-                });
-                """
-            else:
-                js = """
-                var ele = document.getElementById("{plot_id}");
-                ele.on('plotly_selected', function(eventData){
-                    var selectedpoints = [];
-                    
-                    eventData.points.forEach(function(pt) {
-                        selectedpoints.push(pt.pointNumber);
-                    });
-                    var update = {
-                        'selectedpoints': [selectedpoints]
-                    };
-                    Plotly.restyle("{plot_id}", update)
-                });
-                ele.on('plotly_deselect', function(){
-                    var update = {
-                        'selectedpoints': [null]
-                    };
-                    Plotly.restyle("{plot_id}", update)
-                });
-                """
-
+            # JavaScript event handlers, which link the selection between plots and if in a Jupyter notebook save the
+            # point indices to a variable in the notebook.
+            js = self._JS_JUPYTER if jupyter else self._JS_PLAIN
             # Show the plot with the JavaScript injected into the HTML. See the link below.
             # https://plotly.github.io/plotly.py-docs/generated/plotly.io.write_html.html
             self._fig.show(post_script=js)
@@ -765,20 +1573,76 @@ class Plotter(object):
             # If interactive select is not required, simply display the figure.
             self._fig.show()
 
+    def _get_deckgl_html(self, height=None, width=None):
+        """
+        Create the HTML page drawing the plots of the figure with deck.gl.
+
+        :param height:
+            Optional. The height of the figure in pixels. Default of None fills the window.
+        :param width:
+            Optional. The width of the figure in pixels. Default of None fills the window.
+        :return:
+            The HTML page.
+        """
+        # Times are drawn as milliseconds since the epoch.
+        data = [[a.astype('datetime64[ms]').astype(np.float64) if a.dtype.kind == 'M' else a.astype(np.float64)
+                 for a in (np.asarray(trace.x), np.asarray(trace.y))] for trace in self._fig.data]
+        # The data is scaled to the unit square, using the range of the axes if they have been set.
+        scalings = []
+        for axis, axis_range in enumerate((self._fig.layout.xaxis.range, self._fig.layout.yaxis.range)):
+            if axis_range is None:
+                finite = np.concatenate([d[axis][np.isfinite(d[axis])] for d in data] + [np.array([])])
+                axis_range = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+            low, high = axis_range
+            scalings.append((low, high - low if high > low else 1.0))
+        plots = []
+        for i, (trace, (x, y)) in enumerate(zip(self._fig.data, data)):
+            positions = np.column_stack(((x - scalings[0][0]) / scalings[0][1], (y - scalings[1][0]) / scalings[1][1]))
+            finite = np.isfinite(positions).all(axis=1)
+            # Lines are broken into separate paths where there are missing values, as Plotly does. The paths start at
+            # the first point of each run of valid points.
+            run_starts = finite & ~np.concatenate(([False], finite[:-1]))
+            starts = (np.cumsum(finite) - 1)[run_starts]
+            # Plots with a mode of 'lines' are created without a mode.
+            mode = 'lines' if trace.mode is None else trace.mode
+            color = trace.marker.color if trace.line.color is None else trace.line.color
+            plots.append(dict(
+                positions=base64.b64encode(np.ascontiguousarray(positions[finite], dtype='<f4')).decode('ascii'),
+                starts=starts.tolist(),
+                color=DEFAULT_PLOTLY_COLORS[i % len(DEFAULT_PLOTLY_COLORS)] if color is None else color,
+                size=6 if trace.marker.size is None else trace.marker.size,
+                width=2 if trace.line.width is None else trace.line.width,
+                markers='markers' in mode,
+                lines='lines' in mode
+            ))
+        title = self._fig.layout.title.text
+        return self._DECKGL_HTML.substitute(title='' if title is None else html.escape(title),
+                                            width='100vw' if width is None else '{}px'.format(width),
+                                            height='100vh' if height is None else '{}px'.format(height),
+                                            plots=json.dumps(plots))
+
     def save_plot(self, file, width=None, height=None, scale=None):
         """
-        Save the plot to a file, the type of which is indicated by the extension of the filename.
+        Save the plot to a file, the type of which is indicated by the extension of the filename. With the deck.gl
+        backend a filename ending in .html saves the deck.gl page, otherwise a static image is saved with Plotly.
 
         :param file:
             The path to the file.
         :param width:
-            The width in pixels.
+            Optional. The width in pixels. Default of None indicates 1200.
         :param height:
-            The height in pixels.
+            Optional. The height in pixels. Default of None indicates 600.
         :param scale:
         :return:
         """
-        self._fig.write_image(file, width=width, height=height, scale=scale)
+        if self._backend == 'deckgl' and file.lower().endswith('.html'):
+            with open(file, 'w') as f:
+                f.write(self._get_deckgl_html(height, width))
+            return
+        # The default size is passed with each call rather than set on the Kaleido scope, which would overwrite any
+        # defaults set by the user and set Kaleido up even if plots are never saved.
+        self._fig.write_image(file, width=1200 if width is None else width, height=600 if height is None else height,
+                              scale=scale)
 
 
 if __name__ == '__main__':